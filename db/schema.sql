@@ -1,25 +1,159 @@
 -- NILPOC / NextPlay Nexus: Event-sourced indexing schema (Postgres)
 -- Source of truth: on-chain logs decoded by the indexer.
+-- Hashes, topics and log data are stored as raw BYTEA (32 bytes per hash).
+-- Event arguments are not stored as JSON; chain_events_decoded decodes on read.
 
 -- 1) Raw logs (append-only)
 CREATE TABLE IF NOT EXISTS chain_events (
   id BIGSERIAL PRIMARY KEY,
   chain_id INTEGER NOT NULL,
   block_number BIGINT NOT NULL,
-  block_hash TEXT NOT NULL,
-  tx_hash TEXT NOT NULL,
+  block_hash BYTEA NOT NULL,
+  tx_hash BYTEA NOT NULL,
   tx_index INTEGER,
   log_index INTEGER NOT NULL,
   contract_address TEXT NOT NULL,
-  event_sig TEXT NOT NULL,
+  event_sig BYTEA NOT NULL,
   event_name TEXT NOT NULL,
-  topics JSONB NOT NULL,
-  data JSONB NOT NULL,
-  decoded JSONB NOT NULL,
+  topics BYTEA[] NOT NULL,
+  data BYTEA NOT NULL,
   created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
   UNIQUE(chain_id, tx_hash, log_index)
 );
 
+-- 1b) Raw logs not yet past the indexer's FINALITY_DEPTH. UNLOGGED skips WAL;
+-- rows are rewritten on re-index and moved into chain_events once finalized.
+-- Contents are lost on a crash, so re-index from the last finalized block.
+CREATE UNLOGGED TABLE IF NOT EXISTS chain_events_unlogged (LIKE chain_events INCLUDING ALL);
+
+-- Databases created before hashes moved to BYTEA hold them as hex TEXT (with
+-- or without 0x) and topics/data as JSONB; convert those columns in place.
+-- Tables created by this file already have the new types and are skipped.
+CREATE OR REPLACE FUNCTION pg_temp.hex_to_bytea(hex TEXT) RETURNS BYTEA
+LANGUAGE sql IMMUTABLE AS $$ SELECT decode(regexp_replace(hex, '^0x', ''), 'hex') $$;
+
+CREATE OR REPLACE FUNCTION pg_temp.hex_array_to_bytea(hexes JSONB) RETURNS BYTEA[]
+LANGUAGE sql IMMUTABLE AS $$
+  SELECT COALESCE(array_agg(pg_temp.hex_to_bytea(t) ORDER BY n), '{}')
+  FROM jsonb_array_elements_text(hexes) WITH ORDINALITY AS x(t, n)
+$$;
+
+DO $$
+DECLARE
+  col RECORD;
+BEGIN
+  FOR col IN
+    SELECT table_name, column_name, data_type FROM information_schema.columns
+    WHERE table_schema = current_schema() AND data_type IN ('text', 'jsonb') AND (table_name, column_name) IN (
+      ('chain_events', 'block_hash'), ('chain_events', 'tx_hash'), ('chain_events', 'event_sig'),
+      ('chain_events', 'topics'), ('chain_events', 'data'),
+      ('chain_events_unlogged', 'block_hash'), ('chain_events_unlogged', 'tx_hash'),
+      ('chain_events_unlogged', 'event_sig'), ('chain_events_unlogged', 'topics'),
+      ('chain_events_unlogged', 'data'),
+      ('deals_current', 'terms_hash'), ('deals_current', 'evidence_hash'),
+      ('grants_current', 'terms_hash'), ('grants_current', 'attestation_hash'),
+      ('payouts_current', 'ref'), ('receipts_current', 'order_hash'))
+  LOOP
+    EXECUTE format('ALTER TABLE %I ALTER COLUMN %I TYPE %s USING %s', col.table_name, col.column_name,
+      CASE WHEN col.column_name = 'topics' THEN 'BYTEA[]' ELSE 'BYTEA' END,
+      CASE
+        WHEN col.column_name = 'topics' THEN format('pg_temp.hex_array_to_bytea(%I)', col.column_name)
+        -- data was stored as {"data": "0x..."}
+        WHEN col.data_type = 'jsonb' THEN format('pg_temp.hex_to_bytea(%1$I->>''data'')', col.column_name)
+        ELSE format('pg_temp.hex_to_bytea(%I)', col.column_name)
+      END);
+  END LOOP;
+END $$;
+
+ALTER TABLE IF EXISTS payouts_current ADD COLUMN IF NOT EXISTS authorizer TEXT;
+
+-- Databases created before decoding moved to read time still carry the column.
+ALTER TABLE chain_events DROP COLUMN IF EXISTS decoded;
+ALTER TABLE chain_events_unlogged DROP COLUMN IF EXISTS decoded;
+
+-- 1c) Event ABI catalog, upserted by the indexer from the contract ABIs.
+-- inputs is the ABI input list: [{"name", "type", "indexed"}, ...]. Keyed per
+-- contract: events sharing a signature can differ in which inputs are indexed
+-- (e.g. ERC-20 vs ERC-721 Transfer).
+CREATE TABLE IF NOT EXISTS event_abis (
+  contract_address TEXT NOT NULL,
+  event_sig BYTEA NOT NULL,
+  event_name TEXT NOT NULL,
+  inputs JSONB NOT NULL,
+  PRIMARY KEY(contract_address, event_sig)
+);
+
+-- Big-endian unsigned integer value of an ABI word.
+CREATE OR REPLACE FUNCTION abi_uint(word BYTEA) RETURNS NUMERIC
+LANGUAGE plpgsql IMMUTABLE STRICT AS $$
+DECLARE
+  n NUMERIC := 0;
+BEGIN
+  FOR i IN 0 .. length(word) - 1 LOOP
+    n := n * 256 + get_byte(word, i);
+  END LOOP;
+  RETURN n;
+END $$;
+
+-- Decode a log's arguments against event_abis, for analytical queries only.
+-- Covers elementary types: integers as decimal strings (uint256 overflows
+-- JSON numbers), addresses as lowercase 0x hex, bytes/bytesN as plain hex.
+-- Indexed dynamic values are only available as their topic hash. Unindexed
+-- arrays and tuples decode to NULL; after a static one the head layout is
+-- unknown, so every later unindexed value is NULL too.
+CREATE OR REPLACE FUNCTION decode_log(addr TEXT, sig BYTEA, topics BYTEA[], data BYTEA) RETURNS JSONB
+LANGUAGE plpgsql STABLE AS $$
+DECLARE
+  input JSONB;
+  typ TEXT;
+  word BYTEA;
+  topic_i INTEGER := 2;  -- topics[1] is event_sig
+  head INTEGER := 0;     -- byte offset of the next head word in data
+  offs INTEGER;
+  result JSONB := '{}';
+BEGIN
+  FOR input IN SELECT jsonb_array_elements(inputs) FROM event_abis
+               WHERE contract_address = addr AND event_sig = sig LOOP
+    typ := input->>'type';
+    IF (input->>'indexed')::BOOLEAN THEN
+      word := topics[topic_i];
+      topic_i := topic_i + 1;
+      IF typ IN ('string', 'bytes') OR typ LIKE '%]' OR typ LIKE 'tuple%' THEN
+        result := result || jsonb_build_object(input->>'name', encode(word, 'hex'));
+        CONTINUE;
+      END IF;
+    ELSIF typ LIKE '%]' OR typ LIKE 'tuple%' THEN
+      result := result || jsonb_build_object(input->>'name', NULL);
+      -- A dynamic array takes one offset word; static arrays and tuples are inline.
+      head := CASE WHEN typ LIKE '%[]' THEN head + 32 END;
+      CONTINUE;
+    ELSE
+      word := substring(data FROM head + 1 FOR 32);
+      head := head + 32;
+      IF typ IN ('string', 'bytes') THEN
+        offs := abi_uint(word)::INTEGER;
+        word := substring(data FROM offs + 33 FOR abi_uint(substring(data FROM offs + 1 FOR 32))::INTEGER);
+      END IF;
+    END IF;
+    result := result || jsonb_build_object(input->>'name', CASE
+      WHEN typ = 'address' THEN to_jsonb('0x' || encode(substring(word FROM 13), 'hex'))
+      WHEN typ = 'bool' THEN to_jsonb(get_byte(word, 31) = 1)
+      WHEN typ = 'string' THEN to_jsonb(convert_from(word, 'UTF8'))
+      WHEN typ = 'bytes' THEN to_jsonb(encode(word, 'hex'))
+      WHEN typ ~ '^bytes[0-9]+$' THEN to_jsonb(encode(substring(word FROM 1 FOR substring(typ FROM 6)::INTEGER), 'hex'))
+      WHEN typ ~ '^uint[0-9]*$' THEN to_jsonb(abi_uint(word)::TEXT)
+      WHEN typ ~ '^int[0-9]*$' THEN to_jsonb((abi_uint(word) - CASE WHEN get_byte(word, 0) >= 128
+        THEN 2::NUMERIC ^ 256 ELSE 0 END)::TEXT)
+    END);
+  END LOOP;
+  RETURN result;
+END $$;
+
+-- Includes blocks still inside the indexer's FINALITY_DEPTH (chain_events_unlogged).
+CREATE OR REPLACE VIEW chain_events_decoded AS
+SELECT e.*, decode_log(e.contract_address, e.event_sig, e.topics, e.data) AS decoded
+FROM (SELECT * FROM chain_events UNION ALL SELECT * FROM chain_events_unlogged) e;
+
 -- 2) Deal current state (materialized by upserts from events)
 CREATE TABLE IF NOT EXISTS deals_current (
   chain_id INTEGER NOT NULL,
@@ -29,8 +163,8 @@ CREATE TABLE IF NOT EXISTS deals_current (
   token TEXT NOT NULL,
   amount NUMERIC(78,0) NOT NULL,
   deadline BIGINT NOT NULL,
-  terms_hash TEXT NOT NULL,
-  evidence_hash TEXT,
+  terms_hash BYTEA NOT NULL,
+  evidence_hash BYTEA,
   delivered_at BIGINT,
   status TEXT NOT NULL,
   updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
@@ -45,9 +179,9 @@ CREATE TABLE IF NOT EXISTS grants_current (
   token TEXT NOT NULL,
   amount NUMERIC(78,0) NOT NULL,
   unlock_time BIGINT NOT NULL,
-  terms_hash TEXT NOT NULL,
+  terms_hash BYTEA NOT NULL,
   attested BOOLEAN NOT NULL DEFAULT FALSE,
-  attestation_hash TEXT,
+  attestation_hash BYTEA,
   withdrawn BOOLEAN NOT NULL DEFAULT FALSE,
   refunded BOOLEAN NOT NULL DEFAULT FALSE,
   updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
@@ -57,8 +191,9 @@ CREATE TABLE IF NOT EXISTS grants_current (
 CREATE TABLE IF NOT EXISTS payouts_current (
   chain_id INTEGER NOT NULL,
   payout_id BIGINT NOT NULL,
-  ref TEXT NOT NULL,
+  ref BYTEA NOT NULL,
   payer TEXT NOT NULL,
+  authorizer TEXT NOT NULL,
   token TEXT NOT NULL,
   amount NUMERIC(78,0) NOT NULL,
   split_id BIGINT NOT NULL,
@@ -69,7 +204,7 @@ CREATE TABLE IF NOT EXISTS payouts_current (
 CREATE TABLE IF NOT EXISTS receipts_current (
   chain_id INTEGER NOT NULL,
   token_id BIGINT NOT NULL,
-  order_hash TEXT NOT NULL,
+  order_hash BYTEA NOT NULL,
   buyer TEXT NOT NULL,
   seller TEXT NOT NULL,
   token TEXT NOT NULL,
@@ -1,14 +1,29 @@
+import csv
+import importlib.util
+import io
 import json
 import os
+from bisect import bisect_right
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Dict, Any, Iterable, List
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Dict, Any, Iterable, Iterator, List, Optional
 
-import psycopg2
+import psycopg2.extensions
+from psycopg2.pool import ThreadedConnectionPool
+import requests
 from dotenv import load_dotenv
+from eth_abi import decode as abi_decode
+from eth_utils import keccak, to_checksum_address
 from web3 import Web3
+from web3.exceptions import LogTopicError
 from web3._utils.events import get_event_data
+from web3._utils.method_formatters import log_entry_formatter
 
-from ops.contracts import load_abi
+from ops.contracts import ABI_DIR, load_abi
+from ops.indexed_contracts import INDEXED_CONTRACTS
 
 load_dotenv()
 
@@ -18,227 +33,657 @@ class ContractEventDef:
     abi: Dict[str, Any]
 
 
+@lru_cache(maxsize=None)
+def event_signature_hash(signature: str) -> str:
+    """Return topic0 hex for a canonical event signature like `Foo(uint256,address)`."""
+    return "0x" + keccak(text=signature).hex()
+
+
 def load_event_abis(contract_name: str) -> Dict[str, Dict[str, Any]]:
     """Return mapping event_signature_hex -> event_abi"""
     abis = load_abi(contract_name)
     events = {}
-    w3 = Web3()
     for item in abis:
         if item.get("type") != "event":
             continue
-        sig = w3.keccak(text=f"{item['name']}({','.join([i['type'] for i in item['inputs']])})").hex()
+        sig = event_signature_hash(f"{item['name']}({','.join([i['type'] for i in item['inputs']])})")
         events[sig] = item
     return events
 
 
+EVENTS_GENERATED = Path(__file__).with_name("events_generated.py")
+
+
+def load_generated_event_abis() -> Dict[str, Dict[str, Dict[str, Any]]]:
+    """Return the event table ops/export_manifest.py precomputes, minus stale entries.
+
+    The file is loaded by path: run as a script, this module shadows the
+    `indexer` package. A contract whose ABI JSON is newer than the table is
+    left out so it falls back to load_event_abis.
+    """
+    if not EVENTS_GENERATED.exists():
+        return {}
+    spec = importlib.util.spec_from_file_location("indexer_events_generated", EVENTS_GENERATED)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    built = EVENTS_GENERATED.stat().st_mtime
+    fresh = {}
+    for name, events in module.EVENT_ABIS.items():
+        abi_path = ABI_DIR / f"{name}.abi.json"
+        if not abi_path.exists() or abi_path.stat().st_mtime <= built:
+            fresh[name] = events
+    return fresh
+
+
+_GENERATED_EVENT_ABIS = load_generated_event_abis()
+
 EVENT_ABIS: Dict[str, Dict[str, Dict[str, Any]]] = {
-    "DealEngine": load_event_abis("DealEngine"),
-    "DeferredVault": load_event_abis("DeferredVault"),
-    "PayoutRouter": load_event_abis("PayoutRouter"),
-    "ReceiptNFT": load_event_abis("ReceiptNFT"),
+    name: _GENERATED_EVENT_ABIS.get(name) or load_event_abis(name) for name in INDEXED_CONTRACTS
 }
 
 
-def connect_db():
-    return psycopg2.connect(os.environ["POSTGRES_DSN"])
+# Web3 and eth_abi only ever yield bytes or HexBytes for hashes and byte values.
+# bytes.hex gives plain hex for both (HexBytes.hex() would add a 0x prefix), and
+# both are passed to psycopg2 as-is, which adapts any bytes subclass to bytea.
+_hex = bytes.hex
 
 
-def upsert_current(cur, chain_id: int, event_name: str, args: Dict[str, Any]):
-    """Apply deterministic upserts for current-state tables."""
-    if event_name == "DealCreated":
-        cur.execute(
-            """
-            INSERT INTO deals_current(chain_id, deal_id, sponsor, athlete, token, amount, deadline, terms_hash, status)
-            VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s)
-            ON CONFLICT (chain_id, deal_id) DO UPDATE SET
-              sponsor=EXCLUDED.sponsor,
-              athlete=EXCLUDED.athlete,
-              token=EXCLUDED.token,
-              amount=EXCLUDED.amount,
-              deadline=EXCLUDED.deadline,
-              terms_hash=EXCLUDED.terms_hash,
-              status=EXCLUDED.status,
-              updated_at=NOW();
-            """,
-            (
-                chain_id,
-                int(args["dealId"]),
-                args["sponsor"],
-                args["athlete"],
-                args["token"],
-                int(args["amount"]),
-                int(args["deadline"]),
-                args["termsHash"].hex() if hasattr(args["termsHash"], "hex") else str(args["termsHash"]),
-                "FUNDED",
-            ),
-        )
-    elif event_name == "DealDelivered":
-        cur.execute(
-            """
-            UPDATE deals_current SET evidence_hash=%s, delivered_at=%s, status=%s, updated_at=NOW()
-            WHERE chain_id=%s AND deal_id=%s;
-            """,
-            (
-                args["evidenceHash"].hex() if hasattr(args["evidenceHash"], "hex") else str(args["evidenceHash"]),
-                int(args["deliveredAt"]),
-                "DELIVERED",
-                chain_id,
-                int(args["dealId"]),
-            ),
-        )
-    elif event_name == "DealSettled":
-        cur.execute(
-            """
-            UPDATE deals_current SET amount=0, status=%s, updated_at=NOW()
-            WHERE chain_id=%s AND deal_id=%s;
-            """,
-            ("SETTLED", chain_id, int(args["dealId"])),
-        )
-    elif event_name == "DealRefunded":
-        cur.execute(
-            """
-            UPDATE deals_current SET amount=0, status=%s, updated_at=NOW()
-            WHERE chain_id=%s AND deal_id=%s;
-            """,
-            ("REFUNDED", chain_id, int(args["dealId"])),
+_CODEC = Web3().codec
+
+
+def _is_elementary(abi_type: str) -> bool:
+    return not (abi_type.startswith("tuple") or abi_type.endswith("]"))
+
+
+def event_decoder(abi: Dict[str, Any]) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    """Build a closure decoding a raw log into its args dict for one event ABI.
+
+    The indexed/non-indexed split and eth_abi type lists are resolved once here,
+    so per-log work is only `eth_abi.decode` over the topics and data. Args match
+    web3's get_event_data; indexed string/bytes values are their 32-byte topic.
+    Like get_event_data, a log with the wrong number of topics raises LogTopicError.
+    """
+    if not all(_is_elementary(i["type"]) for i in abi["inputs"]):
+        # Structs and arrays need web3's recursive normalization (struct fields
+        # by name, checksummed addresses inside them); no indexed contract emits
+        # them, so use get_event_data itself rather than a partial copy of it.
+        def decode_nested(log: Dict[str, Any]) -> Dict[str, Any]:
+            return dict(get_event_data(_CODEC, abi, log)["args"])
+
+        return decode_nested
+
+    # Indexed string/bytes topics hold the keccak of the value, not the value.
+    indexed = [(i["name"], "bytes32" if i["type"] in ("string", "bytes") else i["type"])
+               for i in abi["inputs"] if i["indexed"]]
+    data_names = [i["name"] for i in abi["inputs"] if not i["indexed"]]
+    data_types = [i["type"] for i in abi["inputs"] if not i["indexed"]]
+    addresses = [i["name"] for i in abi["inputs"] if i["type"] == "address"]
+
+    def decode(log: Dict[str, Any]) -> Dict[str, Any]:
+        if len(log["topics"]) != len(indexed) + 1:
+            raise LogTopicError(f"Expected {len(indexed)} log topics.  Got {len(log['topics']) - 1}")
+        args = {name: abi_decode([abi_type], topic)[0] for (name, abi_type), topic in zip(indexed, log["topics"][1:])}
+        args.update(zip(data_names, abi_decode(data_types, log["data"])))
+        for name in addresses:
+            args[name] = to_checksum_address(args[name])
+        return args
+
+    return decode
+
+
+# contract -> topic0 bytes -> (event name, decoder); topic0 stays as bytes so the
+# hot loop never hex-encodes it for lookup.
+EVENT_DECODERS: Dict[str, Dict[bytes, tuple]] = {
+    contract_name: {
+        bytes.fromhex(sig[2:]): (abi["name"], event_decoder(abi))
+        for sig, abi in evmap.items()
+        if not abi.get("anonymous")
+    }
+    for contract_name, evmap in EVENT_ABIS.items()
+}
+
+
+# decode_log() in db/schema.sql reads event inputs from this catalog, so args are
+# only turned into JSON when chain_events_decoded is queried.
+EVENT_CATALOG_SQL = """
+INSERT INTO event_abis(contract_address, event_sig, event_name, inputs)
+SELECT * FROM unnest(%s::text[], %s::bytea[], %s::text[], %s::jsonb[])
+ON CONFLICT (contract_address, event_sig) DO UPDATE SET event_name=EXCLUDED.event_name, inputs=EXCLUDED.inputs;
+"""
+
+
+def sync_event_catalog(cur, addr_to_contract: Dict[str, str]):
+    """Upsert the event ABIs of each indexed contract address into event_abis."""
+    rows = [
+        (addr, bytes.fromhex(sig[2:]), abi["name"],
+         json.dumps([{k: i[k] for k in ("name", "type", "indexed")} for i in abi["inputs"]]))
+        for addr, contract_name in addr_to_contract.items()
+        for sig, abi in EVENT_ABIS[contract_name].items()
+    ]
+    cur.execute(EVENT_CATALOG_SQL, [list(col) for col in zip(*rows)])
+
+
+CHAIN_EVENT_COLUMNS = (
+    "chain_id, block_number, block_hash, tx_hash, tx_index, log_index, "
+    "contract_address, event_sig, event_name, topics, data"
+)
+
+# Decoded logs are held column-major (one list per column) and sent as arrays
+# expanded with unnest. Topics are carried as nullable topic1..topic3 next to
+# event_sig (topic0) so every column is flat; the array is rebuilt in SQL.
+CHAIN_EVENT_ARRAYS = [
+    ("chain_id", "integer[]"),
+    ("block_number", "bigint[]"),
+    ("block_hash", "bytea[]"),
+    ("tx_hash", "bytea[]"),
+    ("tx_index", "integer[]"),
+    ("log_index", "integer[]"),
+    ("contract_address", "text[]"),
+    ("event_sig", "bytea[]"),
+    ("event_name", "text[]"),
+    ("topic1", "bytea[]"),
+    ("topic2", "bytea[]"),
+    ("topic3", "bytea[]"),
+    ("data", "bytea[]"),
+]
+
+# Statements below take the target table via .format(table=...): chain_events for
+# finalized blocks, chain_events_unlogged for blocks still inside FINALITY_DEPTH.
+CHAIN_EVENTS_SQL = f"""
+INSERT INTO {{table}}({CHAIN_EVENT_COLUMNS})
+SELECT chain_id, block_number, block_hash, tx_hash, tx_index, log_index, contract_address, event_sig, event_name,
+  array_remove(ARRAY[event_sig, topic1, topic2, topic3], NULL), data
+FROM unnest({", ".join(f"%s::{t}" for _, t in CHAIN_EVENT_ARRAYS)})
+  AS v({", ".join(name for name, _ in CHAIN_EVENT_ARRAYS)})
+ON CONFLICT (chain_id, tx_hash, log_index) DO NOTHING;
+"""
+
+# Batches larger than this are bulk-loaded with COPY through a staging table.
+COPY_THRESHOLD = 1024
+
+CHAIN_EVENTS_STAGE_SQL = f"""
+CREATE TEMP TABLE IF NOT EXISTS chain_events_stage AS
+SELECT {CHAIN_EVENT_COLUMNS} FROM chain_events WITH NO DATA;
+"""
+
+CHAIN_EVENTS_COPY_SQL = f"COPY chain_events_stage({CHAIN_EVENT_COLUMNS}) FROM STDIN WITH (FORMAT CSV)"
+
+CHAIN_EVENTS_MERGE_SQL = f"""
+INSERT INTO {{table}}({CHAIN_EVENT_COLUMNS})
+SELECT {CHAIN_EVENT_COLUMNS} FROM chain_events_stage
+ON CONFLICT (chain_id, tx_hash, log_index) DO NOTHING;
+TRUNCATE chain_events_stage;
+"""
+
+# Blocks newer than head - FINALITY_DEPTH are written to the UNLOGGED
+# chain_events_unlogged table (no WAL) and replaced wholesale on re-index, so
+# reorged logs do not linger. 0 disables the split and writes chain_events directly.
+FINALITY_DEPTH = int(os.environ.get("FINALITY_DEPTH", "0"))
+
+UNLOGGED_OLDEST_SQL = "SELECT min(block_number) FROM chain_events_unlogged WHERE chain_id=%s;"
+
+UNLOGGED_RESET_SQL = """
+DELETE FROM chain_events_unlogged WHERE chain_id=%s AND block_number BETWEEN %s AND %s;
+"""
+
+PROMOTE_FINALIZED_SQL = f"""
+WITH moved AS (
+  DELETE FROM chain_events_unlogged WHERE chain_id=%s AND block_number <= %s
+  RETURNING {CHAIN_EVENT_COLUMNS}
+)
+INSERT INTO chain_events({CHAIN_EVENT_COLUMNS})
+SELECT {CHAIN_EVENT_COLUMNS} FROM moved
+ON CONFLICT (chain_id, tx_hash, log_index) DO NOTHING;
+"""
+
+
+def new_event_columns() -> Dict[str, list]:
+    return {name: [] for name, _ in CHAIN_EVENT_ARRAYS}
+
+
+def slice_event_columns(cols: Dict[str, list], start: int, stop: Optional[int] = None) -> Dict[str, list]:
+    return {name: values[start:stop] for name, values in cols.items()}
+
+
+def _copy_rows(cols: Dict[str, list]) -> Iterator[list]:
+    """Yield chain_events rows in COPY CSV form; bytea uses the `\\x<hex>` escape."""
+    for (chain_id, block_number, block_hash, tx_hash, tx_index, log_index, addr, sig, name,
+         t1, t2, t3, data) in zip(*(cols[name] for name, _ in CHAIN_EVENT_ARRAYS)):
+        # Backslashes are escapes inside array literals, so double them.
+        topics = "{" + ",".join("\\\\x" + _hex(t) for t in (sig, t1, t2, t3) if t is not None) + "}"
+        yield [chain_id, block_number, "\\x" + _hex(block_hash), "\\x" + _hex(tx_hash), tx_index, log_index,
+               addr, "\\x" + _hex(sig), name, topics, "\\x" + _hex(data)]
+
+
+def insert_chain_events(cur, cols: Dict[str, list], use_copy: Optional[bool] = None, table: str = "chain_events"):
+    """Append decoded log columns to `table`; `use_copy=None` picks COPY for large batches."""
+    count = len(cols["block_number"])
+    if not count:
+        return
+    if use_copy is None:
+        use_copy = count > COPY_THRESHOLD
+    if not use_copy:
+        # One INSERT ... SELECT FROM unnest for the whole batch.
+        cur.execute(CHAIN_EVENTS_SQL.format(table=table), [cols[name] for name, _ in CHAIN_EVENT_ARRAYS])
+        return
+
+    # COPY cannot express ON CONFLICT, so load a staging table and merge from it.
+    buf = io.StringIO()
+    csv.writer(buf).writerows(_copy_rows(cols))
+    buf.seek(0)
+    cur.execute(CHAIN_EVENTS_STAGE_SQL)
+    cur.copy_expert(CHAIN_EVENTS_COPY_SQL, buf)
+    cur.execute(CHAIN_EVENTS_MERGE_SQL.format(table=table))
+
+
+def promote_finalized(cur, chain_id: int, finalized_block: int):
+    """Move rows at or below `finalized_block` from chain_events_unlogged into chain_events."""
+    cur.execute(PROMOTE_FINALIZED_SQL, (chain_id, finalized_block))
+
+
+# Block span per eth_getLogs request; providers commonly cap ranges near this size.
+LOG_WINDOW = int(os.environ.get("LOG_WINDOW", "2000"))
+
+# Windows per JSON-RPC batch. Each batch is decoded and written before the next
+# is fetched, which bounds memory on wide backfills.
+RPC_BATCH_SIZE = int(os.environ.get("RPC_BATCH_SIZE", "10"))
+
+# Keep-alive session reused across RPC batches.
+RPC_SESSION = requests.Session()
+
+
+def block_windows(from_block: int, to_block: int, size: int = LOG_WINDOW) -> List[tuple]:
+    """Split [from_block, to_block] into inclusive windows of at most `size` blocks."""
+    return [(lo, min(lo + size - 1, to_block)) for lo in range(from_block, to_block + 1, size)]
+
+
+def fetch_logs(rpc: str, windows: List[tuple], addresses: List[str], topic0s: List[str]) -> List[Dict[str, Any]]:
+    """Fetch logs for `windows` in a single JSON-RPC batch, sorted in chain order.
+
+    The topic0 filter lets the node drop logs for events outside our ABIs.
+    """
+    payload = [
+        {
+            "jsonrpc": "2.0",
+            "id": i,
+            "method": "eth_getLogs",
+            "params": [{"fromBlock": hex(lo), "toBlock": hex(hi), "address": addresses, "topics": [topic0s]}],
+        }
+        for i, (lo, hi) in enumerate(windows)
+    ]
+    if not payload:
+        return []
+    resp = RPC_SESSION.post(rpc, json=payload, timeout=60)
+    resp.raise_for_status()
+    results = resp.json()
+    if isinstance(results, dict):
+        # Providers answer a rejected batch with a single error object.
+        raise RuntimeError(f"eth_getLogs batch failed: {results.get('error', results)}")
+
+    logs = []
+    for item in results:
+        if "error" in item:
+            raise RuntimeError(f"eth_getLogs failed: {item['error']}")
+        logs.extend(log_entry_formatter(entry) for entry in item["result"])
+    # Apply state transitions in chain order (Created -> Delivered -> Settled).
+    logs.sort(key=lambda l: (l["blockNumber"], l.get("transactionIndex", 0), l["logIndex"]))
+    return logs
+
+
+def iter_log_batches(rpc: str, from_block: int, to_block: int, addresses: List[str], topic0s: List[str]) -> Iterator[List[Dict[str, Any]]]:
+    """Yield chain-ordered logs for [from_block, to_block], one RPC batch at a time.
+
+    The next batch is fetched on a worker thread while the caller decodes and
+    writes the current one, so a cycle costs roughly max(RPC, Postgres) time per
+    batch rather than their sum. At most two batches are held in memory.
+    """
+    windows = block_windows(from_block, to_block)
+    batches = [windows[i:i + RPC_BATCH_SIZE] for i in range(0, len(windows), RPC_BATCH_SIZE)]
+    if not batches:
+        return
+    with ThreadPoolExecutor(max_workers=1) as ex:
+        pending = ex.submit(fetch_logs, rpc, batches[0], addresses, topic0s)
+        for batch in batches[1:]:
+            logs = pending.result()
+            pending = ex.submit(fetch_logs, rpc, batch, addresses, topic0s)
+            yield logs
+        yield pending.result()
+
+
+_POOL: Optional[ThreadedConnectionPool] = None
+
+
+def db_pool() -> ThreadedConnectionPool:
+    """Process-wide connection pool, created on first use and reused across cycles."""
+    global _POOL
+    if _POOL is None:
+        _POOL = ThreadedConnectionPool(
+            1,
+            int(os.environ.get("PG_POOL_MAX", "8")),
+            dsn=os.environ["POSTGRES_DSN"],
+            connection_factory=IndexerConnection,
         )
-    elif event_name == "GrantCreated":
-        cur.execute(
-            """
-            INSERT INTO grants_current(chain_id, grant_id, sponsor, beneficiary, token, amount, unlock_time, terms_hash)
-            VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s)
-            ON CONFLICT (chain_id, grant_id) DO UPDATE SET updated_at=NOW();
-            """,
-            (
-                chain_id,
-                int(args["grantId"]),
-                args["sponsor"],
-                args["beneficiary"],
-                args["token"],
-                int(args["amount"]),
-                int(args["unlockTime"]),
-                args["termsHash"].hex() if hasattr(args["termsHash"], "hex") else str(args["termsHash"]),
-            ),
+    return _POOL
+
+
+# Current-state statements in flush order: rows must be inserted before they
+# are updated, and later lifecycle events must land after earlier ones.
+# Each entry is (event_name, prepared statement name, parameter types, sql,
+# primary-key slice). Parameters are column arrays expanded with unnest, so one
+# EXECUTE applies a whole batch and the plan is reused across cycles.
+UPSERT_STATEMENTS = [
+    (
+        "DealCreated",
+        "deals_created",
+        ["integer[]", "bigint[]", "text[]", "text[]", "text[]", "numeric[]", "bigint[]", "bytea[]", "text[]"],
+        """
+        INSERT INTO deals_current(chain_id, deal_id, sponsor, athlete, token, amount, deadline, terms_hash, status)
+        SELECT * FROM unnest($1, $2, $3, $4, $5, $6, $7, $8, $9)
+        ON CONFLICT (chain_id, deal_id) DO UPDATE SET
+          sponsor=EXCLUDED.sponsor,
+          athlete=EXCLUDED.athlete,
+          token=EXCLUDED.token,
+          amount=EXCLUDED.amount,
+          deadline=EXCLUDED.deadline,
+          terms_hash=EXCLUDED.terms_hash,
+          status=EXCLUDED.status,
+          updated_at=NOW()
+        """,
+        slice(0, 2),
+    ),
+    (
+        "DealDelivered",
+        "deals_delivered",
+        ["bytea[]", "bigint[]", "integer[]", "bigint[]"],
+        """
+        UPDATE deals_current d SET evidence_hash=v.eh, delivered_at=v.da, status='DELIVERED', updated_at=NOW()
+        FROM unnest($1, $2, $3, $4) AS v(eh, da, cid, did)
+        WHERE d.chain_id=v.cid AND d.deal_id=v.did
+        """,
+        slice(2, 4),
+    ),
+    (
+        "DealSettled",
+        "deals_settled",
+        ["integer[]", "bigint[]"],
+        """
+        UPDATE deals_current d SET amount=0, status='SETTLED', updated_at=NOW()
+        FROM unnest($1, $2) AS v(cid, did)
+        WHERE d.chain_id=v.cid AND d.deal_id=v.did
+        """,
+        slice(0, 2),
+    ),
+    (
+        "DealRefunded",
+        "deals_refunded",
+        ["integer[]", "bigint[]"],
+        """
+        UPDATE deals_current d SET amount=0, status='REFUNDED', updated_at=NOW()
+        FROM unnest($1, $2) AS v(cid, did)
+        WHERE d.chain_id=v.cid AND d.deal_id=v.did
+        """,
+        slice(0, 2),
+    ),
+    (
+        "GrantCreated",
+        "grants_created",
+        ["integer[]", "bigint[]", "text[]", "text[]", "text[]", "numeric[]", "bigint[]", "bytea[]"],
+        """
+        INSERT INTO grants_current(chain_id, grant_id, sponsor, beneficiary, token, amount, unlock_time, terms_hash)
+        SELECT * FROM unnest($1, $2, $3, $4, $5, $6, $7, $8)
+        ON CONFLICT (chain_id, grant_id) DO UPDATE SET updated_at=NOW()
+        """,
+        slice(0, 2),
+    ),
+    (
+        "GrantAttested",
+        "grants_attested",
+        ["bytea[]", "integer[]", "bigint[]"],
+        """
+        UPDATE grants_current g SET attested=TRUE, attestation_hash=v.ah, updated_at=NOW()
+        FROM unnest($1, $2, $3) AS v(ah, cid, gid)
+        WHERE g.chain_id=v.cid AND g.grant_id=v.gid
+        """,
+        slice(1, 3),
+    ),
+    (
+        "GrantWithdrawn",
+        "grants_withdrawn",
+        ["integer[]", "bigint[]"],
+        """
+        UPDATE grants_current g SET withdrawn=TRUE, amount=0, updated_at=NOW()
+        FROM unnest($1, $2) AS v(cid, gid)
+        WHERE g.chain_id=v.cid AND g.grant_id=v.gid
+        """,
+        slice(0, 2),
+    ),
+    (
+        "GrantRefunded",
+        "grants_refunded",
+        ["integer[]", "bigint[]"],
+        """
+        UPDATE grants_current g SET refunded=TRUE, amount=0, updated_at=NOW()
+        FROM unnest($1, $2) AS v(cid, gid)
+        WHERE g.chain_id=v.cid AND g.grant_id=v.gid
+        """,
+        slice(0, 2),
+    ),
+    (
+        "PayoutExecuted",
+        "payouts_executed",
+        ["integer[]", "bigint[]", "bytea[]", "text[]", "text[]", "text[]", "numeric[]", "bigint[]", "bigint[]"],
+        """
+        INSERT INTO payouts_current(chain_id, payout_id, ref, payer, authorizer, token, amount, split_id, executed_at)
+        SELECT * FROM unnest($1, $2, $3, $4, $5, $6, $7, $8, $9)
+        ON CONFLICT (chain_id, payout_id) DO NOTHING
+        """,
+        slice(0, 2),
+    ),
+    (
+        "ReceiptMinted",
+        "receipts_minted",
+        ["integer[]", "bigint[]", "bytea[]", "text[]", "text[]", "text[]", "numeric[]", "numeric[]", "text[]"],
+        """
+        INSERT INTO receipts_current(chain_id, token_id, order_hash, buyer, seller, token, price, platform_fee, token_uri)
+        SELECT * FROM unnest($1, $2, $3, $4, $5, $6, $7, $8, $9)
+        ON CONFLICT (chain_id, token_id) DO NOTHING
+        """,
+        slice(0, 2),
+    ),
+]
+
+
+class IndexerConnection(psycopg2.extensions.connection):
+    """Connection that remembers per-session setup already done on it."""
+
+    prepared = False
+    # addr_to_contract last written to event_abis on this session.
+    catalog_synced: Optional[Dict[str, str]] = None
+
+
+def prepare_statements(db: IndexerConnection):
+    """PREPARE every upsert statement once per session so later cycles skip parse/plan."""
+    with db, db.cursor() as cur:
+        # PREPARE is session-scoped and survives ROLLBACK, so clear statements
+        # left over from an earlier attempt that failed part way.
+        cur.execute("DEALLOCATE ALL")
+        for _, stmt, types, sql, _ in UPSERT_STATEMENTS:
+            cur.execute(f"PREPARE {stmt}({', '.join(types)}) AS {sql}")
+    db.prepared = True
+
+
+def upsert_row(chain_id: int, event_name: str, args: Dict[str, Any]):
+    """Return the current-state row tuple for an event, or None if it has none."""
+    if event_name == "DealCreated":
+        return (
+            chain_id,
+            int(args["dealId"]),
+            args["sponsor"],
+            args["athlete"],
+            args["token"],
+            int(args["amount"]),
+            int(args["deadline"]),
+            args["termsHash"],
+            "FUNDED",
         )
-    elif event_name == "GrantAttested":
-        cur.execute(
-            """
-            UPDATE grants_current SET attested=TRUE, attestation_hash=%s, updated_at=NOW()
-            WHERE chain_id=%s AND grant_id=%s;
-            """,
-            (
-                args["attestationHash"].hex() if hasattr(args["attestationHash"], "hex") else str(args["attestationHash"]),
-                chain_id,
-                int(args["grantId"]),
-            ),
+    if event_name == "DealDelivered":
+        return (
+            args["evidenceHash"],
+            int(args["deliveredAt"]),
+            chain_id,
+            int(args["dealId"]),
         )
-    elif event_name == "GrantWithdrawn":
-        cur.execute(
-            """
-            UPDATE grants_current SET withdrawn=TRUE, amount=0, updated_at=NOW()
-            WHERE chain_id=%s AND grant_id=%s;
-            """,
-            (chain_id, int(args["grantId"])),
+    if event_name in ("DealSettled", "DealRefunded"):
+        return (chain_id, int(args["dealId"]))
+    if event_name == "GrantCreated":
+        return (
+            chain_id,
+            int(args["grantId"]),
+            args["sponsor"],
+            args["beneficiary"],
+            args["token"],
+            int(args["amount"]),
+            int(args["unlockTime"]),
+            args["termsHash"],
         )
-    elif event_name == "GrantRefunded":
-        cur.execute(
-            """
-            UPDATE grants_current SET refunded=TRUE, amount=0, updated_at=NOW()
-            WHERE chain_id=%s AND grant_id=%s;
-            """,
-            (chain_id, int(args["grantId"])),
+    if event_name == "GrantAttested":
+        return (
+            args["attestationHash"],
+            chain_id,
+            int(args["grantId"]),
         )
-    elif event_name == "PayoutExecuted":
-        cur.execute(
-            """
-            INSERT INTO payouts_current(chain_id, payout_id, ref, payer, authorizer, token, amount, split_id, executed_at)
-            VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s)
-            ON CONFLICT (chain_id, payout_id) DO NOTHING;
-            """,
-            (
-                chain_id,
-                int(args["payoutId"]),
-                args["ref"].hex() if hasattr(args["ref"], "hex") else str(args["ref"]),
-                args["payer"],
-                args.get("authorizer", args["payer"]),
-                args["token"],
-                int(args["amount"]),
-                int(args["splitId"]),
-                int(args["at"]),
-            ),
+    if event_name in ("GrantWithdrawn", "GrantRefunded"):
+        return (chain_id, int(args["grantId"]))
+    if event_name == "PayoutExecuted":
+        return (
+            chain_id,
+            int(args["payoutId"]),
+            args["ref"],
+            args["payer"],
+            args.get("authorizer", args["payer"]),
+            args["token"],
+            int(args["amount"]),
+            int(args["splitId"]),
+            int(args["at"]),
         )
-    elif event_name == "ReceiptMinted":
-        cur.execute(
-            """
-            INSERT INTO receipts_current(chain_id, token_id, order_hash, buyer, seller, token, price, platform_fee, token_uri)
-            VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s)
-            ON CONFLICT (chain_id, token_id) DO NOTHING;
-            """,
-            (
-                chain_id,
-                int(args["tokenId"]),
-                args["orderHash"].hex() if hasattr(args["orderHash"], "hex") else str(args["orderHash"]),
-                args["buyer"],
-                args["seller"],
-                args["token"],
-                int(args["price"]),
-                int(args["platformFee"]),
-                args["tokenURI"],
-            ),
+    if event_name == "ReceiptMinted":
+        return (
+            chain_id,
+            int(args["tokenId"]),
+            args["orderHash"],
+            args["buyer"],
+            args["seller"],
+            args["token"],
+            int(args["price"]),
+            int(args["platformFee"]),
+            args["tokenURI"],
         )
+    return None
+
 
+def flush_upserts(cur, grouped: Dict[str, List[tuple]]):
+    """Apply deterministic upserts for current-state tables, one statement per event type."""
+    for event_name, stmt, types, _, key in UPSERT_STATEMENTS:
+        rows = grouped.get(event_name)
+        if not rows:
+            continue
+        # A single statement cannot touch the same conflict target twice;
+        # keep the last occurrence per primary key.
+        deduped = list({row[key]: row for row in rows}.values())
+        columns = [list(col) for col in zip(*deduped)]
+        cur.execute(f"EXECUTE {stmt}({', '.join(['%s'] * len(types))})", columns)
 
-def index_once(from_block: int, to_block: int, contracts: Dict[str, str]):
+
+def decode_logs(chain_id: int, logs: List[Dict[str, Any]], addr_to_contract: Dict[str, str]):
+    """Decode logs into chain_events columns and current-state rows grouped by event name."""
+    grouped: Dict[str, List[tuple]] = defaultdict(list)
+    cols = new_event_columns()
+    for log in logs:
+        if not log["topics"]:
+            continue
+        # log_entry_formatter already checksums the address.
+        addr = log["address"]
+        topic0 = log["topics"][0]
+        entry = EVENT_DECODERS[addr_to_contract[addr]].get(topic0)
+        if entry is None:
+            continue
+        event_name, decode = entry
+        args = decode(log)
+
+        topics = log["topics"]
+        cols["chain_id"].append(chain_id)
+        cols["block_number"].append(int(log["blockNumber"]))
+        cols["block_hash"].append(log["blockHash"])
+        cols["tx_hash"].append(log["transactionHash"])
+        cols["tx_index"].append(int(log.get("transactionIndex", 0)))
+        cols["log_index"].append(int(log["logIndex"]))
+        cols["contract_address"].append(addr)
+        cols["event_sig"].append(topic0)
+        cols["event_name"].append(event_name)
+        cols["topic1"].append(topics[1] if len(topics) > 1 else None)
+        cols["topic2"].append(topics[2] if len(topics) > 2 else None)
+        cols["topic3"].append(topics[3] if len(topics) > 3 else None)
+        cols["data"].append(log["data"])
+
+        row = upsert_row(chain_id, event_name, args)
+        if row is not None:
+            grouped[event_name].append(row)
+    return cols, grouped
+
+
+def index_once(from_block: int, to_block: int, contracts: Dict[str, str], use_copy: Optional[bool] = None):
     rpc = os.environ["RPC_URL"]
     chain_id = int(os.environ.get("CHAIN_ID", "0"))
-    w3 = Web3(Web3.HTTPProvider(rpc))
-
-    db = connect_db()
-    db.autocommit = False
-    cur = db.cursor()
-
-    for contract_name, addr in contracts.items():
-        addr = Web3.to_checksum_address(addr)
-        evmap = EVENT_ABIS[contract_name]
-        logs = w3.eth.get_logs({"fromBlock": from_block, "toBlock": to_block, "address": addr})
-        for log in logs:
-            if not log["topics"]:
-                continue
-            sig = log["topics"][0].hex()
-            if sig not in evmap:
-                continue
-            abi = evmap[sig]
-            decoded = get_event_data(w3.codec, abi, log)
-            args = decoded["args"]
-
-            cur.execute(
-                """
-                INSERT INTO chain_events(chain_id, block_number, block_hash, tx_hash, tx_index, log_index,
-                  contract_address, event_sig, event_name, topics, data, decoded)
-                VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)
-                ON CONFLICT (chain_id, tx_hash, log_index) DO NOTHING;
-                """,
-                (
-                    chain_id,
-                    int(log["blockNumber"]),
-                    log["blockHash"].hex(),
-                    log["transactionHash"].hex(),
-                    int(log.get("transactionIndex", 0)),
-                    int(log["logIndex"]),
-                    addr,
-                    sig,
-                    abi["name"],
-                    json.dumps([t.hex() for t in log["topics"]]),
-                    json.dumps({"data": log["data"]}),
-                    json.dumps({k: (v.hex() if hasattr(v, "hex") else str(v)) for k, v in dict(args).items()}),
-                ),
-            )
-
-            upsert_current(cur, chain_id, abi["name"], args)
-
-    db.commit()
-    cur.close()
-    db.close()
+    # The head is only needed to resolve "latest" or the finality cut-off.
+    head = None
+    if to_block == "latest" or FINALITY_DEPTH:
+        head = Web3(Web3.HTTPProvider(rpc)).eth.block_number
+    if to_block == "latest":
+        to_block = head
+    from_block, to_block = int(from_block), int(to_block)
+    finalized = head - FINALITY_DEPTH if FINALITY_DEPTH else None
+
+    # eth_getLogs accepts an address list, so one call covers every contract.
+    addr_to_contract = {Web3.to_checksum_address(a): name for name, a in contracts.items()}
+    topic0s = sorted({sig for name in contracts for sig in EVENT_ABIS[name]})
+
+    pool = db_pool()
+    db = pool.getconn()
+    try:
+        if not db.prepared:
+            prepare_statements(db)
+        if db.catalog_synced != addr_to_contract:
+            with db, db.cursor() as cur:
+                sync_event_catalog(cur, addr_to_contract)
+            db.catalog_synced = addr_to_contract
+        # Commits on success and rolls back on error; the connection stays open.
+        with db, db.cursor() as cur:
+            if finalized is not None:
+                # Unlogged rows were written before their block was final and may
+                # since have been reorged out. Re-fetch from the oldest one so the
+                # promote below only ever moves rows this cycle has re-read.
+                cur.execute(UNLOGGED_OLDEST_SQL, (chain_id,))
+                oldest = cur.fetchone()[0]
+                if oldest is not None:
+                    from_block = min(from_block, oldest)
+                cur.execute(UNLOGGED_RESET_SQL, (chain_id, from_block, to_block))
+
+            for logs in iter_log_batches(rpc, from_block, to_block, list(addr_to_contract), topic0s):
+                cols, grouped = decode_logs(chain_id, logs, addr_to_contract)
+                if finalized is None:
+                    insert_chain_events(cur, cols, use_copy=use_copy)
+                else:
+                    # Logs are in block order, so the finalized ones are a prefix.
+                    cut = bisect_right(cols["block_number"], finalized)
+                    insert_chain_events(cur, slice_event_columns(cols, 0, cut), use_copy=use_copy)
+                    insert_chain_events(cur, slice_event_columns(cols, cut), use_copy=use_copy, table="chain_events_unlogged")
+                flush_upserts(cur, grouped)
+
+            if finalized is not None:
+                # Rows above to_block were not re-read this cycle; leave them unlogged.
+                promote_finalized(cur, chain_id, min(finalized, to_block))
+    finally:
+        pool.putconn(db)
 
 
 if __name__ == "__main__":
@@ -252,9 +697,8 @@ if __name__ == "__main__":
     fb = int(os.environ.get("FROM_BLOCK", "0"))
     tb_raw = os.environ.get("TO_BLOCK", "latest")
     if tb_raw == "latest":
-        # resolved inside the node
+        # resolved against the node's head block
         tb = "latest"
     else:
         tb = int(tb_raw)
-    # web3 accepts "latest" for toBlock
     index_once(fb, tb, contracts)
@@ -1,8 +1,15 @@
 import json
 import os
+import pprint
+import re
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 import shutil
 
+from eth_utils import keccak
+
+from ops.indexed_contracts import INDEXED_CONTRACTS
+
 """Export deployment manifests + ABIs for TS/Python/Indexer consumers.
 
 This script expects Foundry broadcast artifacts like:
@@ -11,6 +18,7 @@ This script expects Foundry broadcast artifacts like:
 It will:
   - write deployments/manifests/<chainId>.json
   - copy ABI JSON from out/ to deployments/abis/
+  - generate python/indexer/events_generated.py for the indexer
 """
 
 ROOT = Path(__file__).resolve().parents[2]  # repo root
@@ -18,6 +26,7 @@ OUT_DIR = ROOT / "out"
 BROADCAST_DIR = ROOT / "broadcast"
 MANIFEST_DIR = ROOT / "deployments" / "manifests"
 ABIS_DIR = ROOT / "deployments" / "abis"
+EVENTS_MODULE = ROOT / "python" / "indexer" / "events_generated.py"
 
 def load_run(chain_id: str):
     run_path = BROADCAST_DIR / "DeployCore.s.sol" / chain_id / "run-latest.json"
@@ -36,21 +45,73 @@ def extract_deployed_addresses(run_json):
                 addrs[name] = addr
     return addrs
 
+# Foundry writes "abi" as the first key of each artifact.
+_LEADING_ABI = re.compile(rb'\s*\{\s*"abi"\s*:\s*')
+_DECODER = json.JSONDecoder()
+
+def _extract_abi(p: Path):
+    """Return (filename, contractName, abi) for a Foundry artifact, or None."""
+    raw = p.read_bytes()
+    # Cheap substring test so non-contract JSON (build-info, caches) is never parsed.
+    if b'"abi"' not in raw:
+        return None
+    try:
+        m = _LEADING_ABI.match(raw)
+        if m and b'"contractName"' not in raw:
+            # Decode only the abi value and skip the (much larger) bytecode fields.
+            data = {"abi": _DECODER.raw_decode(raw.decode(), m.end())[0]}
+        else:
+            data = json.loads(raw)
+    except Exception:
+        return None
+    if "abi" in data and isinstance(data["abi"], list):
+        return p.name, data.get("contractName"), data["abi"]
+    return None
+
 def copy_abis():
+    """Copy artifact ABIs into deployments/abis/ and return {artifact stem: abi}."""
     ABIS_DIR.mkdir(parents=True, exist_ok=True)
     if not OUT_DIR.exists():
         print("No out/ directory found; run `forge build` first.")
-        return
+        return {}
+    abis = {}
     # Copy all ABI JSON artifacts (keep filename stable)
-    for p in OUT_DIR.rglob("*.json"):
-        # Foundry artifact json contains abi + bytecode; keep only those for contracts
-        try:
-            data = json.loads(p.read_text())
-        except Exception:
+    paths = list(OUT_DIR.rglob("*.json"))
+    # JSON decoding is CPU-bound, so parse artifacts across processes; writes stay serial.
+    with ProcessPoolExecutor() as ex:
+        for result in ex.map(_extract_abi, paths, chunksize=32):
+            if result is None:
+                continue
+            name, contract_name, abi = result
+            dst = ABIS_DIR / name
+            dst.write_text(json.dumps({"contractName": contract_name, "abi": abi}, indent=2))
+            abis[Path(name).stem] = abi
+    return abis
+
+def write_events_module(abis):
+    """Write the indexer's event table as a Python literal.
+
+    Maps contract -> topic0 hex -> trimmed event ABI, so the indexer starts
+    without reading ABI JSON or hashing signatures.
+    """
+    events = {}
+    for name in INDEXED_CONTRACTS:
+        if name not in abis:
             continue
-        if "abi" in data and isinstance(data["abi"], list):
-            dst = ABIS_DIR / p.name
-            dst.write_text(json.dumps({"contractName": data.get("contractName"), "abi": data["abi"]}, indent=2))
+        events[name] = {}
+        for item in abis[name]:
+            if item.get("type") != "event":
+                continue
+            signature = f"{item['name']}({','.join(i['type'] for i in item['inputs'])})"
+            events[name]["0x" + keccak(text=signature).hex()] = {
+                "name": item["name"],
+                "anonymous": item.get("anonymous", False),
+                "inputs": [{"name": i["name"], "type": i["type"], "indexed": i["indexed"]} for i in item["inputs"]],
+            }
+    EVENTS_MODULE.write_text(
+        '"""Generated by ops/export_manifest.py from Foundry ABIs; do not edit."""\n\n'
+        f"EVENT_ABIS = {pprint.pformat(events, width=120, sort_dicts=False)}\n"
+    )
 
 def main():
     chain_id = os.environ.get("CHAIN_ID")
@@ -70,8 +131,10 @@ def main():
     manifest_path.write_text(json.dumps(manifest, indent=2))
     print("Wrote manifest:", manifest_path)
 
-    copy_abis()
+    abis = copy_abis()
     print("ABIs exported to:", ABIS_DIR)
+    write_events_module(abis)
+    print("Wrote indexer events:", EVENTS_MODULE)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,6 @@
+"""Contracts whose events the indexer decodes.
+
+Kept free of heavy imports so export_manifest can share it with the indexer.
+"""
+
+INDEXED_CONTRACTS = ("DealEngine", "DeferredVault", "PayoutRouter", "ReceiptNFT")
@@ -1,6 +1,10 @@
 import os
+from functools import lru_cache
+from eth_abi import encode
 from eth_account import Account
-from eth_account.messages import encode_typed_data
+from eth_account.messages import SignableMessage, encode_typed_data
+from eth_utils import keccak
+from hexbytes import HexBytes
 from web3 import Web3
 from dotenv import load_dotenv
 
@@ -20,6 +24,9 @@ Set env:
 DOMAIN_NAME = "NILPOC-PayoutRouter"
 DOMAIN_VERSION = "1"
 
+EIP712_DOMAIN_TYPEHASH = keccak(text="EIP712Domain(string name,string version,uint256 chainId,address verifyingContract)")
+PAYOUT_TYPEHASH = keccak(text="Payout(bytes32 ref,address token,uint256 amount,uint256 splitId,uint256 nonce,uint256 deadline)")
+
 def domain(chain_id: int, verifying_contract: str):
     return {
         "name": DOMAIN_NAME,
@@ -90,6 +97,43 @@ def sign_payout(private_key: str, chain_id: int, verifying_contract: str, ref: b
     sig = acct.sign_message(msg).signature
     return acct.address, sig.hex()
 
+@lru_cache(maxsize=None)
+def domain_separator(chain_id: int, verifying_contract: str) -> bytes:
+    """EIP-712 domain separator; constant for a (chain, router) pair, so computed once."""
+    return keccak(
+        encode(
+            ["bytes32", "bytes32", "bytes32", "uint256", "address"],
+            [
+                EIP712_DOMAIN_TYPEHASH,
+                keccak(text=DOMAIN_NAME),
+                keccak(text=DOMAIN_VERSION),
+                chain_id,
+                Web3.to_checksum_address(verifying_contract),
+            ],
+        )
+    )
+
+def payout_message(separator: bytes, ref, token: str, amount: int, split_id: int, nonce: int, deadline: int) -> SignableMessage:
+    """EIP-712 Payout message; `ref` may be bytes or 0x-hex, as in sign_payout."""
+    struct_hash = keccak(
+        encode(
+            ["bytes32", "bytes32", "address", "uint256", "uint256", "uint256", "uint256"],
+            [PAYOUT_TYPEHASH, HexBytes(ref), Web3.to_checksum_address(token), amount, split_id, nonce, deadline],
+        )
+    )
+    return SignableMessage(b"\x01", separator, struct_hash)
+
+def sign_payout_many(private_key: str, chain_id: int, verifying_contract: str, records):
+    """Sign many Payout messages, reusing the account and domain separator.
+
+    `records` is an iterable of dicts with sign_payout's message kwargs
+    (ref, token, amount, split_id, nonce, deadline). Signatures match sign_payout.
+    """
+    acct = Account.from_key(private_key)
+    separator = domain_separator(chain_id, verifying_contract)
+    sigs = [acct.sign_message(payout_message(separator, **r)).signature.hex() for r in records]
+    return acct.address, sigs
+
 if __name__ == "__main__":
     pk = os.environ["PRIVATE_KEY"]
     chain_id = int(os.environ.get("CHAIN_ID", "11155111"))
@@ -0,0 +1,26 @@
+import importlib
+from pathlib import Path
+
+import pytest
+
+from ops import contracts
+from ops.indexed_contracts import INDEXED_CONTRACTS
+
+UI_ABIS = Path(__file__).resolve().parents[2] / "ui" / "src" / "abis"
+
+
+@pytest.fixture(scope="session")
+def abi_dir(tmp_path_factory):
+    """deployments/abis stand-in holding the ABIs committed for the UI."""
+    path = tmp_path_factory.mktemp("abis")
+    for name in INDEXED_CONTRACTS:
+        (path / f"{name}.abi.json").write_text((UI_ABIS / f"{name}.json").read_text())
+    return path
+
+
+@pytest.fixture(scope="session")
+def indexer(abi_dir):
+    # The indexer loads ABIs at import, so point it at abi_dir first.
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(contracts, "ABI_DIR", abi_dir)
+        return importlib.import_module("indexer.indexer")
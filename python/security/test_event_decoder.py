@@ -0,0 +1,121 @@
+import random
+
+import pytest
+from eth_abi import encode
+from eth_utils import keccak, to_checksum_address
+from eth_utils.abi import collapse_if_tuple
+from web3 import Web3
+from web3._utils.events import get_event_data
+from web3._utils.method_formatters import log_entry_formatter
+from web3.exceptions import LogTopicError
+
+
+def sample(rng: random.Random, param):
+    abi_type = param["type"]
+    if abi_type.endswith("]"):
+        inner = {**param, "type": abi_type[:abi_type.rindex("[")]}
+        size = abi_type[abi_type.rindex("[") + 1:-1]
+        return [sample(rng, inner) for _ in range(int(size) if size else rng.randint(0, 3))]
+    if abi_type == "tuple":
+        return tuple(sample(rng, c) for c in param["components"])
+    if abi_type == "address":
+        return to_checksum_address(rng.randbytes(20))
+    if abi_type == "bool":
+        return rng.random() < 0.5
+    if abi_type == "string":
+        return f"ipfs://{rng.randbytes(8).hex()}"
+    if abi_type == "bytes":
+        return rng.randbytes(rng.randint(0, 70))
+    if abi_type.startswith("bytes"):
+        return rng.randbytes(int(abi_type[5:]))
+    if abi_type.startswith("uint"):
+        return rng.randrange(2 ** int(abi_type[4:] or 256))
+    bits = int(abi_type[3:] or 256)
+    return rng.randrange(-(2 ** (bits - 1)), 2 ** (bits - 1))
+
+
+def make_log(rng: random.Random, abi):
+    signature = f"{abi['name']}({','.join(collapse_if_tuple(i) for i in abi['inputs'])})"
+    topics = ["0x" + keccak(text=signature).hex()]
+    data_types, data_values = [], []
+    for i in abi["inputs"]:
+        value = sample(rng, i)
+        if i["indexed"] and i["type"] in ("string", "bytes"):
+            # Indexed dynamic values are stored as their hash.
+            topics.append("0x" + keccak(value.encode() if isinstance(value, str) else value).hex())
+        elif i["indexed"]:
+            topics.append("0x" + encode([i["type"]], [value]).hex())
+        else:
+            data_types.append(collapse_if_tuple(i))
+            data_values.append(value)
+    return log_entry_formatter({
+        "address": "0x" + "11" * 20,
+        "topics": topics,
+        "data": "0x" + encode(data_types, data_values).hex(),
+        "blockNumber": "0x1",
+        "blockHash": "0x" + "22" * 32,
+        "transactionHash": "0x" + "33" * 32,
+        "transactionIndex": "0x0",
+        "logIndex": "0x0",
+        "removed": False,
+    })
+
+
+def param(name, abi_type, indexed=False, components=None):
+    p = {"name": name, "type": abi_type, "indexed": indexed}
+    if components:
+        p["components"] = components
+    return p
+
+
+# Shapes the NILPOC contracts do not emit today but event_decoder must still
+# decode like web3: indexed strings, arrays and structs with nested addresses.
+SYNTHETIC_EVENTS = [
+    {"type": "event", "name": "Tagged", "anonymous": False, "inputs": [
+        param("tag", "string", indexed=True), param("blob", "bytes", indexed=True), param("note", "string"),
+        param("delta", "int128"),
+    ]},
+    {"type": "event", "name": "Batch", "anonymous": False, "inputs": [
+        param("id", "uint256", indexed=True), param("who", "address[]"), param("refs", "bytes32[]"),
+        param("pair", "uint64[2]"),
+    ]},
+    {"type": "event", "name": "Split", "anonymous": False, "inputs": [
+        param("id", "uint256", indexed=True),
+        param("split", "tuple", components=[param("recipient", "address"), param("bps", "uint16")]),
+        param("shares", "tuple[]", components=[param("recipient", "address"), param("amount", "uint256")]),
+    ]},
+]
+
+
+def event_abis(indexer):
+    indexed = [abi for evmap in indexer.EVENT_ABIS.values() for abi in evmap.values() if not abi.get("anonymous")]
+    return indexed + SYNTHETIC_EVENTS
+
+
+def test_event_decoder_matches_get_event_data(indexer):
+    codec = Web3().codec
+    rng = random.Random(0)
+    for abi in event_abis(indexer):
+        decode = indexer.event_decoder(abi)
+        for _ in range(5):
+            log = make_log(rng, abi)
+            expected = dict(get_event_data(codec, abi, log)["args"])
+            args = decode(log)
+            assert args == expected, abi["name"]
+            assert list(args) == list(expected), abi["name"]
+            assert [type(v) for v in args.values()] == [type(v) for v in expected.values()], abi["name"]
+
+
+def test_event_decoder_rejects_topic_count_mismatch(indexer):
+    codec = Web3().codec
+    rng = random.Random(1)
+    for abi in event_abis(indexer):
+        log = make_log(rng, abi)
+        for topics in (log["topics"][:-1], log["topics"] + [log["topics"][-1]]):
+            if not topics:
+                continue
+            bad = {**log, "topics": topics}
+            with pytest.raises(LogTopicError):
+                get_event_data(codec, abi, bad)
+            with pytest.raises(LogTopicError):
+                indexer.event_decoder(abi)(bad)
@@ -0,0 +1,52 @@
+import json
+import os
+
+from ops import contracts, export_manifest
+from ops.indexed_contracts import INDEXED_CONTRACTS
+
+
+def generate(tmp_path, monkeypatch, indexer, abi_dir):
+    """Write events_generated.py into tmp_path and point the indexer at it."""
+    module = tmp_path / "events_generated.py"
+    monkeypatch.setattr(export_manifest, "EVENTS_MODULE", module)
+    monkeypatch.setattr(indexer, "EVENTS_GENERATED", module)
+    monkeypatch.setattr(indexer, "ABI_DIR", abi_dir)
+    monkeypatch.setattr(contracts, "ABI_DIR", abi_dir)
+    export_manifest.write_events_module(
+        {name: json.loads((abi_dir / f"{name}.abi.json").read_text()) for name in INDEXED_CONTRACTS}
+    )
+    # As after an export: the table is newer than every ABI it was built from.
+    built = module.stat().st_mtime
+    for name in INDEXED_CONTRACTS:
+        os.utime(abi_dir / f"{name}.abi.json", (built - 10, built - 10))
+    return module
+
+
+def test_generated_table_matches_abi_json(tmp_path, monkeypatch, indexer, abi_dir):
+    generate(tmp_path, monkeypatch, indexer, abi_dir)
+    generated = indexer.load_generated_event_abis()
+    assert set(generated) == set(INDEXED_CONTRACTS)
+    for name in INDEXED_CONTRACTS:
+        expected = indexer.load_event_abis(name)
+        assert set(generated[name]) == set(expected), name
+        for sig, abi in expected.items():
+            assert generated[name][sig]["name"] == abi["name"]
+            assert generated[name][sig]["anonymous"] == abi.get("anonymous", False)
+            assert generated[name][sig]["inputs"] == [
+                {"name": i["name"], "type": i["type"], "indexed": i["indexed"]} for i in abi["inputs"]
+            ]
+
+
+def test_newer_abi_json_falls_back(tmp_path, monkeypatch, indexer, abi_dir):
+    module = generate(tmp_path, monkeypatch, indexer, abi_dir)
+    built = module.stat().st_mtime
+    stale = abi_dir / "ReceiptNFT.abi.json"
+    os.utime(stale, (built + 10, built + 10))
+    generated = indexer.load_generated_event_abis()
+    assert "ReceiptNFT" not in generated
+    assert set(generated) == set(INDEXED_CONTRACTS) - {"ReceiptNFT"}
+
+
+def test_missing_generated_module(tmp_path, monkeypatch, indexer):
+    monkeypatch.setattr(indexer, "EVENTS_GENERATED", tmp_path / "events_generated.py")
+    assert indexer.load_generated_event_abis() == {}
@@ -0,0 +1,49 @@
+import json
+
+from ops.export_manifest import _extract_abi
+
+ABI = [
+    {"type": "event", "name": "DealCreated", "anonymous": False,
+     "inputs": [{"name": "dealId", "type": "uint256", "indexed": True}]},
+    {"type": "function", "name": "settle", "inputs": [], "outputs": [], "stateMutability": "nonpayable"},
+]
+
+
+def slow_path(path):
+    """What _extract_abi returns when it always falls back to json.loads."""
+    data = json.loads(path.read_bytes())
+    if "abi" in data and isinstance(data["abi"], list):
+        return path.name, data.get("contractName"), data["abi"]
+    return None
+
+
+def test_extract_abi_foundry_layout(tmp_path):
+    # Foundry writes "abi" first and no contractName; the abi value is raw_decoded.
+    path = tmp_path / "DealEngine.json"
+    path.write_text(json.dumps({"abi": ABI, "bytecode": {"object": "0x6080"}, "metadata": {"abi": []}}, indent=2))
+    assert _extract_abi(path) == slow_path(path) == ("DealEngine.json", None, ABI)
+
+
+def test_extract_abi_non_leading_abi(tmp_path):
+    named = tmp_path / "Named.json"
+    named.write_text(json.dumps({"abi": ABI, "contractName": "DealEngine"}))
+    assert _extract_abi(named) == slow_path(named) == ("Named.json", "DealEngine", ABI)
+
+    trailing = tmp_path / "Trailing.json"
+    trailing.write_text(json.dumps({"contractName": "DealEngine", "bytecode": "0x", "abi": ABI}))
+    assert _extract_abi(trailing) == slow_path(trailing) == ("Trailing.json", "DealEngine", ABI)
+
+
+def test_extract_abi_skips_non_contract_json(tmp_path):
+    build_info = tmp_path / "build-info.json"
+    build_info.write_text(json.dumps({"id": "abc", "solcVersion": "0.8.24"}))
+    assert _extract_abi(build_info) is None
+
+    not_a_list = tmp_path / "cache.json"
+    not_a_list.write_text(json.dumps({"abi": "see out/", "files": {}}))
+    assert _extract_abi(not_a_list) is None
+    assert slow_path(not_a_list) is None
+
+    broken = tmp_path / "broken.json"
+    broken.write_text('{"abi": [')
+    assert _extract_abi(broken) is None
@@ -0,0 +1,96 @@
+import pytest
+
+
+class StubSession:
+    """Stands in for RPC_SESSION: records batches and answers with `respond(payload)`."""
+
+    def __init__(self, respond):
+        self.respond = respond
+        self.payloads = []
+
+    def post(self, url, json, timeout):
+        self.payloads.append(json)
+        body = self.respond(json)
+
+        class Response:
+            def raise_for_status(self):
+                pass
+
+            def json(self):
+                return body
+
+        return Response()
+
+
+def raw_log(block, tx_index, log_index):
+    return {
+        "address": "0x" + "11" * 20,
+        "topics": ["0x" + "aa" * 32],
+        "data": "0x",
+        "blockNumber": hex(block),
+        "blockHash": "0x" + "22" * 32,
+        "transactionHash": "0x" + f"{block:04x}{tx_index:04x}" * 8,
+        "transactionIndex": hex(tx_index),
+        "logIndex": hex(log_index),
+        "removed": False,
+    }
+
+
+def test_block_windows_edges(indexer):
+    assert indexer.block_windows(7, 7, size=10) == [(7, 7)]
+    assert indexer.block_windows(0, 3999, size=2000) == [(0, 1999), (2000, 3999)]
+    assert indexer.block_windows(0, 4000, size=2000) == [(0, 1999), (2000, 3999), (4000, 4000)]
+    assert indexer.block_windows(10, 9, size=10) == []
+    assert len(indexer.block_windows(0, 2 * indexer.LOG_WINDOW - 1)) == 2
+
+
+def test_fetch_logs_batches_windows_and_sorts(indexer, monkeypatch):
+    windows = [(0, 9), (10, 19), (20, 20)]
+    # Logs within a window and the batch items themselves arrive out of order.
+    by_window = {
+        0: [raw_log(5, 1, 3), raw_log(5, 0, 1)],
+        1: [raw_log(12, 0, 0)],
+        2: [raw_log(20, 0, 0), raw_log(1, 2, 0)],
+    }
+    session = StubSession(
+        lambda payload: [{"jsonrpc": "2.0", "id": r["id"], "result": by_window[r["id"]]} for r in reversed(payload)]
+    )
+    monkeypatch.setattr(indexer, "RPC_SESSION", session)
+
+    logs = indexer.fetch_logs("http://rpc", windows, ["0xA", "0xB"], ["0xT1", "0xT2"])
+
+    assert len(session.payloads) == 1
+    assert [r["method"] for r in session.payloads[0]] == ["eth_getLogs"] * 3
+    assert [r["params"][0] for r in session.payloads[0]] == [
+        {"fromBlock": hex(lo), "toBlock": hex(hi), "address": ["0xA", "0xB"], "topics": [["0xT1", "0xT2"]]}
+        for lo, hi in windows
+    ]
+    assert [(l["blockNumber"], l["transactionIndex"], l["logIndex"]) for l in logs] == [
+        (1, 2, 0), (5, 0, 1), (5, 1, 3), (12, 0, 0), (20, 0, 0)
+    ]
+
+
+def test_fetch_logs_no_windows(indexer, monkeypatch):
+    session = StubSession(lambda payload: pytest.fail("no request expected"))
+    monkeypatch.setattr(indexer, "RPC_SESSION", session)
+    assert indexer.fetch_logs("http://rpc", [], ["0xA"], ["0xT"]) == []
+    assert session.payloads == []
+
+
+def test_fetch_logs_rejected_batch(indexer, monkeypatch):
+    error = {"code": -32600, "message": "batch too large"}
+    monkeypatch.setattr(indexer, "RPC_SESSION", StubSession(lambda payload: {"jsonrpc": "2.0", "id": None, "error": error}))
+    with pytest.raises(RuntimeError, match="batch too large"):
+        indexer.fetch_logs("http://rpc", [(0, 9), (10, 19)], ["0xA"], ["0xT"])
+
+
+def test_fetch_logs_item_error(indexer, monkeypatch):
+    def respond(payload):
+        return [
+            {"jsonrpc": "2.0", "id": 0, "result": [raw_log(1, 0, 0)]},
+            {"jsonrpc": "2.0", "id": 1, "error": {"code": -32005, "message": "query returned more than 10000 results"}},
+        ]
+
+    monkeypatch.setattr(indexer, "RPC_SESSION", StubSession(respond))
+    with pytest.raises(RuntimeError, match="more than 10000 results"):
+        indexer.fetch_logs("http://rpc", [(0, 9), (10, 19)], ["0xA"], ["0xT"])
@@ -0,0 +1,29 @@
+import random
+
+from ops.sign_payout import sign_payout, sign_payout_many
+
+PRIVATE_KEY = "0x" + "11" * 32
+CHAIN_ID = 11155111
+ROUTER = "0x" + "22" * 20
+
+
+def test_sign_payout_many_matches_sign_payout():
+    rng = random.Random(0)
+    records = [
+        dict(
+            ref=rng.randbytes(32),
+            token="0x" + rng.randbytes(20).hex(),
+            amount=rng.randint(0, 2**256 - 1),
+            split_id=rng.randint(0, 2**64),
+            nonce=i,
+            deadline=2**31 - 1,
+        )
+        for i in range(20)
+    ]
+    # sign_payout also accepts a 0x-hex ref.
+    records.append({**records[0], "ref": "0x" + records[0]["ref"].hex()})
+
+    signer, sigs = sign_payout_many(PRIVATE_KEY, CHAIN_ID, ROUTER, records)
+    assert len(sigs) == len(records)
+    for record, sig in zip(records, sigs):
+        assert (signer, sig) == sign_payout(PRIVATE_KEY, CHAIN_ID, ROUTER, **record)